@@ -1,6 +1,13 @@
 # agent_monster.py
 import random
-from typing import Tuple, Optional, List, Dict, Any
+from typing import Tuple, Optional, List, Dict, Any, NamedTuple
+
+
+class EventoMonstruo(NamedTuple):
+    """Resultado de un ciclo del monstruo: acción decidida, si se ejecutó y el motivo."""
+    accion: str
+    exito: bool
+    razon: str
 
 
 class AgenteReflejoMonstruo:
@@ -16,6 +23,11 @@ class AgenteReflejoMonstruo:
         '+Y': (0, 1, 0), '-Y': (0, -1, 0),
         '+Z': (0, 0, 1), '-Z': (0, 0, -1)
     }
+    # Desplazamientos en el mismo orden que `_DIRECCIONES`, listos para recorrer sin crear pares por ciclo
+    _DESPLAZAMIENTOS: Tuple[Tuple[int, int, int], ...] = tuple(_DIRECCIONES.values())
+
+    # Atributos fijos por instancia; `simulacion` lo asigna la simulación que registra al monstruo
+    __slots__ = ("id", "x", "y", "z", "p_movimiento", "activo", "simulacion")
 
     def __init__(self, id: int, x: int, y: int, z: int, p_movimiento: float = 0.7) -> None:
         """Inicializa el agente reflejo con posición inicial y probabilidad de movimiento."""
@@ -34,53 +46,63 @@ class AgenteReflejoMonstruo:
 
     def _obtener_movimientos_validos(self, entorno: Any) -> List[Tuple[int, int, int]]:
         """Devuelve las direcciones transitables hacia Zonas Libres dentro del entorno."""
+        # Límites y consulta a la malla en línea: 6 vecinas no justifican un gather de NumPy ni una llamada por vecina
+        x, y, z, N = self.x, self.y, self.z, entorno.N
+        grid, vacia = entorno.grid, entorno.ZONA_VACIA
         movimientos_validos = []
-        for _, (dx, dy, dz) in self._DIRECCIONES.items():
-            nx, ny, nz = self.x + dx, self.y + dy, self.z + dz
-            if self._es_movimiento_valido(entorno, nx, ny, nz):
+        for dx, dy, dz in self._DESPLAZAMIENTOS:
+            nx, ny, nz = x + dx, y + dy, z + dz
+            if 0 <= nx < N and 0 <= ny < N and 0 <= nz < N and grid.item(nx, ny, nz) != vacia:
                 movimientos_validos.append((dx, dy, dz))
         return movimientos_validos
 
-    def _es_movimiento_valido(self, entorno: Any, x: int, y: int, z: int) -> bool:
-        """Retorna True si la coordenada destino está dentro del entorno y es Zona Libre."""
-        if not (0 <= x < entorno.N and 0 <= y < entorno.N and 0 <= z < entorno.N):
-            return False
-        return entorno.grid[x, y, z] != entorno.ZONA_VACIA
-
     def decidir_accion(self, percepcion: Dict[str, Any], ciclo_actual: int, K: int) -> Dict[str, Any]:
         """
         Determina la acción a ejecutar según el ciclo actual, la probabilidad y las zonas libres.
         """
+        razon = self._motivo_inactividad(ciclo_actual, K)
+        if razon:
+            return {"accion": "inactivo", "direccion": None, "razon": razon}
+        return self._elegir_movimiento(percepcion)
+
+    def _motivo_inactividad(self, ciclo_actual: int, K: int) -> Optional[str]:
+        """Motivo por el que el monstruo no actúa en este ciclo, o None; el azar se tira solo si toca actuar."""
         if ciclo_actual % K != 0:
-            return {"accion": "inactivo", "direccion": None, "razon": "no_en_ciclo"}
+            return "no_en_ciclo"
         if random.random() > self.p_movimiento:
-            return {"accion": "inactivo", "direccion": None, "razon": "no_supera_probabilidad"}
+            return "no_supera_probabilidad"
+        return None
+
+    @staticmethod
+    def _elegir_movimiento(percepcion: Dict[str, Any]) -> Dict[str, Any]:
+        """Elige al azar una de las direcciones transitables percibidas."""
         if not percepcion["puede_moverse"]:
             return {"accion": "inactivo", "direccion": None, "razon": "sin_movimientos_validos"}
 
         direccion = random.choice(percepcion["movimientos_validos"])
         return {"accion": "mover", "direccion": direccion, "razon": "movimiento_aleatorio"}
 
-    def ejecutar_accion(self, accion: str, direccion: Optional[Tuple[int, int, int]]) -> bool:
-        """Ejecuta el movimiento actualizando la posición si la acción es 'mover'."""
+    def ejecutar_accion(self, accion: str, direccion: Optional[Tuple[int, int, int]], entorno: Any) -> bool:
+        """Ejecuta el movimiento si la acción es 'mover' y mantiene al día el índice espacial del entorno."""
         if accion == "mover" and direccion:
+            anterior = (self.x, self.y, self.z)
             dx, dy, dz = direccion
             self.x += dx
             self.y += dy
             self.z += dz
+            entorno.actualizar_posicion_monstruo(self, anterior)
             return True
         return False
 
-    def percibir_decidir_actuar(self, t: int, entorno: Any, K: int) -> Dict[str, Any]:
+    def percibir_decidir_actuar(self, t: int, entorno: Any, K: int) -> EventoMonstruo:
         """Ejecuta el ciclo completo de percepción, decisión y acción."""
-        percepcion = self.percibir(entorno)
-        decision = self.decidir_accion(percepcion, t, K)
-        exito = self.ejecutar_accion(decision["accion"], decision["direccion"])
-        return {
-            "accion": decision["accion"],
-            "exito": exito,
-            "razon": decision.get("razon", "")
-        }
+        # Fuera de turno o con tirada fallida no hace falta percibir; el azar se consume en el mismo orden
+        razon = self._motivo_inactividad(t, K)
+        if razon:
+            return EventoMonstruo("inactivo", False, razon)
+        decision = self._elegir_movimiento(self.percibir(entorno))
+        exito = self.ejecutar_accion(decision["accion"], decision["direccion"], entorno)
+        return EventoMonstruo(decision["accion"], exito, decision.get("razon", ""))
 
     def __repr__(self) -> str:
         """Devuelve una representación textual simplificada del agente."""
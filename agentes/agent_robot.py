@@ -1,7 +1,8 @@
 # agent_robot.py
 import copy
 import random
-from typing import Any, Dict, List, Optional, Set, Tuple
+from array import array
+from typing import Any, Collection, Dict, List, NamedTuple, Optional, Set, Tuple
 
 # Direcciones y rotaciones posibles en el espacio energético tridimensional
 _ORIENTACIONES: Dict[str, Tuple[int, int, int]] = {
@@ -10,12 +11,59 @@ _ORIENTACIONES: Dict[str, Tuple[int, int, int]] = {
     '+Z': (0, 0, 1), '-Z': (0, 0, -1)
 }
 
-# Rotación cíclica en el plano XY
-_ORIENTACIONES_CICLICAS = ['+X', '+Y', '-X', '-Y']
+# Rotación cíclica en el plano XY (+X → +Y → -X → -Y): orientación resultante de girar +90 / -90.
+# ±Z giran como si partieran de +X
+_GIRO_POSITIVO: Dict[str, str] = {'+X': '+Y', '+Y': '-X', '-X': '-Y', '-Y': '+X', '+Z': '+Y', '-Z': '+Y'}
+_GIRO_NEGATIVO: Dict[str, str] = {'+X': '-Y', '+Y': '+X', '-X': '+Y', '-Y': '-X', '+Z': '-Y', '-Z': '-Y'}
+
+# Códigos enteros de orientaciones y acciones usados en el historial empaquetado
+_NOMBRES_ORIENTACIONES: Tuple[str, ...] = tuple(_ORIENTACIONES)
+_CODIGOS_ORIENTACION: Dict[str, int] = {ori: i for i, ori in enumerate(_NOMBRES_ORIENTACIONES)}
+_NOMBRES_ACCIONES: Tuple[str, ...] = ("PROPULSOR", "REORIENTADOR", "VACUUMATOR")
+_CODIGOS_ACCION: Dict[str, int] = {accion: i for i, accion in enumerate(_NOMBRES_ACCIONES)}
+
+# Cada fila del historial ocupa 6 enteros: orientación, banderas (E | R<<1 | V<<2 | M<<3), acción, x, y, z previos
+_COLUMNAS_HISTORIAL = 6
+
+# Direcciones visibles por orientación (todas excepto la posterior): (dx, dy, dz, etiqueta, es_frente)
+_DIRECCIONES_VISIBLES: Dict[str, Tuple[Tuple[int, int, int, str, bool], ...]] = {
+    ori: tuple(
+        (ddx, ddy, ddz, etiqueta, (ddx, ddy, ddz) == (dx, dy, dz))
+        for etiqueta, (ddx, ddy, ddz) in _ORIENTACIONES.items()
+        if (ddx, ddy, ddz) != (-dx, -dy, -dz)
+    )
+    for ori, (dx, dy, dz) in _ORIENTACIONES.items()
+}
 
 # Clave de percepción extendida: (energómetro, roboscanner, (monstroscopio_detectado, pos_relativa), vacuscopio)
 PercepcionClave = Tuple[bool, bool, Tuple[bool, Optional[str]], bool]
 
+# Códigos enteros del monstroscopio: 0 = sin detección, 1 = al frente, 2 = al lado
+_CODIGOS_MONSTROSCOPIO: Dict[Tuple[bool, Optional[str]], int] = {
+    (False, None): 0, (True, "al_frente"): 1, (True, "al_lado"): 2
+}
+
+
+def _codificar_clave(energometro: bool, roboscanner: bool, codigo_monstruo: int, vacuscopio: bool) -> int:
+    """Empaqueta la percepción en un entero de 5 bits: E·16 | R·8 | V·4 | monstroscopio."""
+    return (energometro << 4) | (roboscanner << 3) | (vacuscopio << 2) | codigo_monstruo
+
+
+def _aplanar_tabla(tabla: Dict[PercepcionClave, Dict[str, Any]]) -> List[Optional[Dict[str, Any]]]:
+    """Convierte la tabla percepción–acción en una lista indexada por la clave empaquetada."""
+    plana: List[Optional[Dict[str, Any]]] = [None] * 32
+    for (energometro, roboscanner, monstroscopio, vacuscopio), regla in tabla.items():
+        plana[_codificar_clave(energometro, roboscanner, _CODIGOS_MONSTROSCOPIO[monstroscopio], vacuscopio)] = regla
+    return plana
+
+
+class ResultadoEfector(NamedTuple):
+    """Resultado inmutable de un efector (propulsor, reorientador o vacuumator)."""
+    accion: str
+    exito: bool
+    razon: str
+    resultado: Optional[Dict[str, Any]] = None
+
 
 class AgenteRacionalRobot:
     """Agente racional tipo robot que caza monstruos en el entorno N³."""
@@ -61,13 +109,19 @@ class AgenteRacionalRobot:
         (False, False, (False, None), False): {"accion": "PROPULSOR", "razon": "accion_por_defecto"},
     }
 
+    # Atributos fijos por instancia; `simulacion` lo asigna la simulación que registra al robot
+    __slots__ = ("id", "x", "y", "z", "orientacion", "memoria", "tabla_mapeo", "_tabla_plana", "reglas_usadas",
+                 "activo", "simulacion")
+
     def __init__(self, id: int, x: int, y: int, z: int, orientacion: Optional[str] = None) -> None:
         """Inicializa el robot con posición, orientación y memoria independiente."""
         self.id = id
         self.x, self.y, self.z = int(x), int(y), int(z)
-        self.orientacion = orientacion if orientacion in _ORIENTACIONES else random.choice(list(_ORIENTACIONES.keys()))
-        self.memoria = {'historial': [], 'vacuscopio_activado': False, 'posicion_anterior': (x, y, z)}
+        self.orientacion = orientacion if orientacion in _ORIENTACIONES else random.choice(_NOMBRES_ORIENTACIONES)
+        self.memoria = {'historial': array('i'), 'ticks': array('i'), 'vacuscopio_activado': False,
+                        'posicion_anterior': (x, y, z), 'celdas_bloqueadas': set()}
         self.tabla_mapeo = copy.deepcopy(self._TABLA_BASE)
+        self._tabla_plana = _aplanar_tabla(self.tabla_mapeo)
         self.reglas_usadas: Set[int] = set()
         self.activo = True
 
@@ -76,51 +130,70 @@ class AgenteRacionalRobot:
     # -------------------------------------------------------------------------
     def percibir(self, robots: List[Any], monstruos: List[Any]) -> Dict[str, Any]:
         """Lee sensores locales para construir la percepción actual del entorno."""
-        dx, dy, dz = _ORIENTACIONES[self.orientacion]
-        frente = (self.x + dx, self.y + dy, self.z + dz)
+        energometro, roboscanner, vacuscopio, codigo_monstruo, dir_label = self._leer_sensores(
+            {(r.x, r.y, r.z) for r in robots if r.id != self.id},
+            {(m.x, m.y, m.z) for m in monstruos}
+        )
         return {
             'giroscopio': self.orientacion,
-            'energometro': any((m.x, m.y, m.z) == (self.x, self.y, self.z) for m in monstruos),
-            'roboscanner': any((r.x, r.y, r.z) == frente and r.id != self.id for r in robots),
-            'vacuscopio': self.memoria.get('vacuscopio_activado', False),
-            'monstroscopio': self._detectar_monstruos(monstruos, dx, dy, dz),
+            'energometro': energometro,
+            'roboscanner': roboscanner,
+            'vacuscopio': vacuscopio,
+            'monstroscopio': (codigo_monstruo, dir_label),
             'posicion_anterior': self.memoria.get('posicion_anterior')
         }
 
-    def _detectar_monstruos(self, monstruos: List[Any], dx: int, dy: int, dz: int) -> Tuple[
-        bool, Optional[str], Optional[str]]:
-        """Detecta monstruos al frente o a los lados, excluyendo la parte posterior."""
-        atras = (-dx, -dy, -dz)
-        for dir_label, (ddx, ddy, ddz) in _ORIENTACIONES.items():
-            if (ddx, ddy, ddz) == atras:
-                continue
-            if any((m.x, m.y, m.z) == (self.x + ddx, self.y + ddy, self.z + ddz) for m in monstruos):
-                return (True, "al_frente", dir_label) if (ddx, ddy, ddz) == (dx, dy, dz) else (True, "al_lado",
-                                                                                               dir_label)
-        return False, None, None
+    def _leer_sensores(self, celdas_robots: Collection[Tuple[int, int, int]],
+                       celdas_monstruos: Collection[Tuple[int, int, int]]) -> Tuple[bool, bool, bool, int, Optional[str]]:
+        """
+        Lee energómetro, roboscanner, vacuscopio y monstroscopio (código y dirección) en una sola pasada.
+
+        Recibe las celdas ocupadas por otros robots y por monstruos; solo se consultan por pertenencia.
+        """
+        dx, dy, dz = _ORIENTACIONES[self.orientacion]
+        codigo_monstruo, dir_label = self._detectar_monstruos(celdas_monstruos)
+        return (
+            (self.x, self.y, self.z) in celdas_monstruos,
+            (self.x + dx, self.y + dy, self.z + dz) in celdas_robots,
+            self.memoria.get('vacuscopio_activado', False),
+            codigo_monstruo,
+            dir_label
+        )
+
+    def _detectar_monstruos(self, celdas_monstruos: Collection[Tuple[int, int, int]]) -> Tuple[int, Optional[str]]:
+        """Detecta monstruos al frente (código 1) o a los lados (código 2), excluyendo la parte posterior."""
+        for ddx, ddy, ddz, dir_label, es_frente in _DIRECCIONES_VISIBLES[self.orientacion]:
+            if (self.x + ddx, self.y + ddy, self.z + ddz) in celdas_monstruos:
+                return 1 if es_frente else 2, dir_label
+        return 0, None
 
     # -------------------------------------------------------------------------
     # DECISIÓN Y ACCIÓN
     # -------------------------------------------------------------------------
     def decidir_accion(self, percepcion: Dict[str, Any]) -> Dict[str, Any]:
         """Selecciona la acción según la tabla percepción–acción."""
-        clave = (
+        codigo_monstruo, dir_label = percepcion["monstroscopio"]
+        clave = _codificar_clave(
             percepcion["energometro"],
             percepcion["roboscanner"],
-            percepcion["monstroscopio"][:2],
+            codigo_monstruo,
             percepcion["vacuscopio"]
         )
+        accion, param, razon = self._aplicar_regla(clave, dir_label)
+        return {"accion": accion, "param": param, "razon": razon}
+
+    def _aplicar_regla(self, clave: int, dir_label: Optional[str]) -> Tuple[str, Optional[str], str]:
+        """Consulta la tabla plana con la clave empaquetada y devuelve (acción, parámetro, razón)."""
         self.memoria["vacuscopio_activado"] = False
-        regla = self.tabla_mapeo.get(clave)
+        regla = self._tabla_plana[clave]
         if regla:
             # MÉTRICA: registrar regla usada
             if hasattr(self, "simulacion"):
-                self.simulacion.metricas["reglas_usadas"].add(id(regla))
-            return {"accion": regla["accion"], "param": regla.get("param", percepcion["monstroscopio"][2]),
-                    "razon": regla["razon"]}
-        return {"accion": "PROPULSOR", "param": percepcion["monstroscopio"][2], "razon": "accion_por_defecto"}
+                self.simulacion.metricas.reglas_usadas.add(id(regla))
+            return regla["accion"], regla.get("param", dir_label), regla["razon"]
+        return "PROPULSOR", dir_label, "accion_por_defecto"
 
-    def ejecutar_accion(self, accion: str, param: Optional[str], entorno: Any, monstruos: List[Any]) -> Dict[str, Any]:
+    def ejecutar_accion(self, accion: str, param: Optional[str], entorno: Any, monstruos: List[Any]) -> ResultadoEfector:
         """Ejecuta el efector correspondiente (propulsor, reorientador o vacuumator)."""
         if accion == "PROPULSOR":
             return self._propulsor(entorno)
@@ -128,73 +201,86 @@ class AgenteRacionalRobot:
             return self._reorientador(param or "+90")
         if accion == "VACUUMATOR":
             return self._vacuumator(entorno, monstruos)
-        return {"exito": False, "razon": "accion_no_reconocida", "resultado": {}}
+        return ResultadoEfector(accion, False, "accion_no_reconocida")
 
     # -------------------------------------------------------------------------
     # EFECTORES
     # -------------------------------------------------------------------------
-    def _propulsor(self, entorno: Any) -> Dict[str, Any]:
+    def _propulsor(self, entorno: Any) -> ResultadoEfector:
         """Avanza hacia adelante según la orientación; activa Vacuscopio si choca."""
         dx, dy, dz = _ORIENTACIONES[self.orientacion]
         nx, ny, nz = self.x + dx, self.y + dy, self.z + dz
-        tipo = entorno.obtener_tipo_celda(nx, ny, nz)
+        # Las Zonas Vacías nunca vuelven a ser libres: una celda ya chocada no se consulta de nuevo
+        bloqueadas = self.memoria['celdas_bloqueadas']
+        # Límites y lectura de la malla en línea, sin pasar por `obtener_tipo_celda`
+        N = entorno.N
+        libre = ((nx, ny, nz) not in bloqueadas and 0 <= nx < N and 0 <= ny < N and 0 <= nz < N
+                 and entorno.grid.item(nx, ny, nz) == entorno.ZONA_LIBRE)
         # MÉTRICA
         if hasattr(entorno, "simulacion"):
-            entorno.simulacion.metricas["acciones"]["avances"] += 1
-        if tipo == entorno.ZONA_LIBRE:
-            self.memoria['posicion_anterior'] = (self.x, self.y, self.z)
+            entorno.simulacion.metricas.avances += 1
+        if libre:
+            anterior = (self.x, self.y, self.z)
+            self.memoria['posicion_anterior'] = anterior
             self.x, self.y, self.z = nx, ny, nz
+            entorno.actualizar_posicion_robot(self, anterior)
             self.memoria['vacuscopio_activado'] = False
-            return {"accion": "PROPULSOR", "exito": True, "razon": "avance_exitoso"}
+            return ResultadoEfector("PROPULSOR", True, "avance_exitoso")
         else:
+            bloqueadas.add((nx, ny, nz))
             # MÉTRICA: colisión
             if hasattr(entorno, "simulacion"):
-                entorno.simulacion.metricas["colisiones"] += 1
-                if not entorno.simulacion.metricas["primer_vacuumator"]:
-                    entorno.simulacion.metricas["colisiones_pre_primera_caza"] += 1
+                entorno.simulacion.metricas.colisiones += 1
+                if not entorno.simulacion.metricas.primer_vacuumator:
+                    entorno.simulacion.metricas.colisiones_pre_primera_caza += 1
             self.memoria['vacuscopio_activado'] = True
-            return {"accion": "PROPULSOR", "exito": False, "resultado": {"colision": True},
-                    "razon": "colision_con_pared"}
+            return ResultadoEfector("PROPULSOR", False, "colision_con_pared", {"colision": True})
 
-    def _reorientador(self, sentido: str = '+90') -> Dict[str, Any]:
+    def _reorientador(self, sentido: str = '+90') -> ResultadoEfector:
         """Gira 90° o se alinea a una dirección específica."""
         if hasattr(self, "simulacion"):
-            self.simulacion.metricas["acciones"]["rotaciones"] += 1  # MÉTRICA
+            self.simulacion.metricas.rotaciones += 1  # MÉTRICA
         if sentido in _ORIENTACIONES:
             self.orientacion = sentido
-            return {"accion": "REORIENTADOR", "exito": True, "razon": "alineacion_directa"}
-        if self.orientacion not in _ORIENTACIONES_CICLICAS:
-            self.orientacion = '+X'
-        i = _ORIENTACIONES_CICLICAS.index(self.orientacion)
-        self.orientacion = _ORIENTACIONES_CICLICAS[(i + 1) % 4] if sentido == '+90' else _ORIENTACIONES_CICLICAS[
-            (i - 1) % 4]
-        return {"accion": "REORIENTADOR", "exito": True, "razon": "rotacion_lateral"}
-
-    def _vacuumator(self, entorno: Any, monstruos: List[Any]) -> Dict[str, Any]:
+            return ResultadoEfector("REORIENTADOR", True, "alineacion_directa")
+        self.orientacion = (_GIRO_POSITIVO if sentido == '+90' else _GIRO_NEGATIVO)[self.orientacion]
+        return ResultadoEfector("REORIENTADOR", True, "rotacion_lateral")
+
+    def _vacuumator(self, entorno: Any, monstruos: List[Any]) -> ResultadoEfector:
         """Destruye monstruos en la celda actual y se autodestruye."""
         eliminados = [m for m in monstruos if (m.x, m.y, m.z) == (self.x, self.y, self.z)]
         for m in eliminados:
             entorno.eliminar_monstruo(m.id)
         entorno.eliminar_robot(self.id)
-        entorno.grid[self.x, self.y, self.z] = entorno.ZONA_VACIA
+        entorno.vaciar_celda(self.x, self.y, self.z)
         # MÉTRICA
         if hasattr(entorno, "simulacion"):
-            entorno.simulacion.metricas["acciones"]["vacuumator"] += 1
-            entorno.simulacion.metricas["monstruos_destruidos"] += len(eliminados)
+            entorno.simulacion.metricas.vacuumator += 1
+            entorno.simulacion.metricas.monstruos_destruidos += len(eliminados)
             if len(eliminados) > 0:
-                entorno.simulacion.metricas["primer_vacuumator"] = True
-        return {"accion": "VACUUMATOR", "exito": bool(eliminados), "razon": "autodestruccion_si_exitoso"}
+                entorno.simulacion.metricas.primer_vacuumator = True
+        return ResultadoEfector("VACUUMATOR", bool(eliminados), "autodestruccion_si_exitoso")
 
     # -------------------------------------------------------------------------
     # CICLO DE VIDA
     # -------------------------------------------------------------------------
-    def percibir_decidir_actuar(self, t: int, entorno: Any) -> Dict[str, Any]:
-        """Ejecuta un ciclo completo: percepción, decisión y acción, con evasión de bucles."""
-        percepcion = self.percibir(entorno.robots, entorno.monstruos)
-        decision = self.decidir_accion(percepcion)
-        accion, param = decision["accion"], decision["param"]
-        self.actualizar_memoria(t, percepcion, accion)
-        evento = self.ejecutar_accion(accion, param, entorno, entorno.monstruos)
+    def percibir_decidir_actuar(self, t: int, entorno: Any) -> ResultadoEfector:
+        """
+        Ejecuta un ciclo completo: percepción, decisión y acción, con evasión de bucles.
+
+        Los sensores se leen una sola vez en variables locales que alimentan directamente la tabla y la memoria,
+        sin construir los diccionarios intermedios de `percibir` y `decidir_accion`.
+        """
+        orientacion, posicion_anterior = self.orientacion, self.memoria['posicion_anterior']
+        # El índice espacial del entorno responde a los sensores sin recorrer las listas de agentes
+        energometro, roboscanner, vacuscopio, codigo_monstruo, dir_label = self._leer_sensores(
+            entorno.celdas_robots, entorno.celdas_monstruos)
+        accion, param, _ = self._aplicar_regla(
+            _codificar_clave(energometro, roboscanner, codigo_monstruo, vacuscopio), dir_label)
+        self._registrar_historial(
+            t, orientacion, energometro | roboscanner << 1 | vacuscopio << 2 | (codigo_monstruo != 0) << 3,
+            accion, posicion_anterior)
+        evento = self.ejecutar_accion(accion, param, entorno, entorno.monstruos_en((self.x, self.y, self.z)))
 
         bucle = self.detectar_bucle()
         if bucle:
@@ -202,54 +288,60 @@ class AgenteRacionalRobot:
             if repeticiones >= 2:
                 self._evadir_bucle(entorno)
 
-        return {"accion": accion, "exito": evento.get("exito", False), "razon": evento.get("razon", decision["razon"])}
+        return evento
 
     # -------------------------------------------------------------------------
     # MEMORIA Y BUCLES
     # -------------------------------------------------------------------------
     def actualizar_memoria(self, t: int, percepcion: Dict[str, Any], accion: str) -> None:
-        """Guarda percepciones y acciones en la memoria simbólica."""
-        self.memoria['historial'].append({
-            't': t,
-            'p': {
-                'ori': percepcion.get('giroscopio'),
-                'E': percepcion.get('energometro', False),
-                'R': percepcion.get('roboscanner', False),
-                'M': bool(percepcion.get('monstroscopio')),
-                'V': percepcion.get('vacuscopio', False),
-                'pos_prev': percepcion.get('posicion_anterior'),
-            },
-            'a': accion
-        })
+        """Guarda percepciones y acciones en la memoria simbólica como una fila de enteros empaquetados."""
+        banderas = (
+                percepcion.get('energometro', False)
+                | percepcion.get('roboscanner', False) << 1
+                | percepcion.get('vacuscopio', False) << 2
+                | (percepcion['monstroscopio'][0] != 0) << 3
+        )
+        self._registrar_historial(t, percepcion.get('giroscopio'), banderas, accion,
+                                  percepcion.get('posicion_anterior'))
+
+    def _registrar_historial(self, t: int, orientacion: str, banderas: int, accion: str,
+                             posicion_anterior: Tuple[int, int, int]) -> None:
+        """Añade una fila empaquetada (orientación, banderas, acción, posición previa) al historial."""
+        px, py, pz = posicion_anterior
+        self.memoria['historial'].extend(
+            (_CODIGOS_ORIENTACION[orientacion], banderas, _CODIGOS_ACCION[accion], px, py, pz)
+        )
+        self.memoria['ticks'].append(t)
 
     def detectar_bucle(self, min_len: int = 2, min_repeticiones: int = 2) -> Optional[Tuple[int, int]]:
         """Detecta repeticiones consecutivas de patrones de percepción–acción."""
-        historial = self.memoria.get('historial', [])
-        n = len(historial)
+        historial = self.memoria['historial']
+        n = len(historial) // _COLUMNAS_HISTORIAL
         if n < min_len * min_repeticiones:
             return None
-        secuencia = [(tuple(sorted(h['p'].items())), h['a']) for h in historial]
         for l in range(min_len, n // min_repeticiones + 1):
-            patron = secuencia[-l:]
+            ancho = l * _COLUMNAS_HISTORIAL
+            patron = historial[-ancho:]
             repeticiones = 1
             for i in range(2, min_repeticiones + 3):
                 if n - i * l < 0:
                     break
-                if patron == secuencia[-i * l:-(i - 1) * l]:
+                if patron == historial[-i * ancho:-(i - 1) * ancho]:
                     repeticiones += 1
                 else:
                     break
             if repeticiones >= min_repeticiones:
                 if hasattr(self, "simulacion"):
-                    self.simulacion.metricas["bucles_detectados"] += 1  # MÉTRICA
+                    self.simulacion.metricas.bucles_detectados += 1  # MÉTRICA
                 return l, repeticiones
         return None
 
     def _evadir_bucle(self, entorno: Any) -> None:
         """Cambia orientación y movimiento si se detecta un bucle conductual."""
         opuestas = {"+X": "-X", "-X": "+X", "+Y": "-Y", "-Y": "+Y", "+Z": "-Z", "-Z": "+Z"}
-        historial = self.memoria.get('historial', [])[-6:]
-        ultimas_oris = [h["p"]["ori"] for h in historial if "p" in h and "ori" in h["p"]]
+        ultimas_oris = {
+            _NOMBRES_ORIENTACIONES[i] for i in self.memoria['historial'][-6 * _COLUMNAS_HISTORIAL::_COLUMNAS_HISTORIAL]
+        }
 
         orientaciones_filtradas = [
                                       o for o in _ORIENTACIONES.keys()
@@ -264,7 +356,7 @@ class AgenteRacionalRobot:
         if random.random() < 0.4:
             self._propulsor(entorno)
 
-    def exportar_historial_csv(self, carpeta: str = "resultados/historiales") -> None:
+    def exportar_historial_csv(self, carpeta: str = "resultados/historiales", mostrar: bool = True) -> None:
         """Exporta el historial de percepciones y acciones del robot a un CSV con fecha y hora en el nombre."""
 
         import csv
@@ -291,25 +383,23 @@ class AgenteRacionalRobot:
             "accion"
         ]
 
-        # Crear y escribir el archivo CSV
+        # Crear y escribir el archivo CSV: las filas se generan al vuelo desde el historial empaquetado
+        historial = self.memoria["historial"]
+        filas = (
+            (t, _NOMBRES_ORIENTACIONES[ori], bool(banderas & 1), bool(banderas & 2), bool(banderas & 8),
+             bool(banderas & 4), (px, py, pz), _NOMBRES_ACCIONES[accion])
+            for t, (ori, banderas, accion, px, py, pz) in zip(
+                self.memoria["ticks"],
+                zip(*(historial[i::_COLUMNAS_HISTORIAL] for i in range(_COLUMNAS_HISTORIAL)))
+            )
+        )
         with open(ruta, "w", newline="", encoding="utf-8") as csvfile:
-            writer = csv.DictWriter(csvfile, fieldnames=columnas)
-            writer.writeheader()
-
-            for h in self.memoria.get("historial", []):
-                p = h.get("p", {})
-                writer.writerow({
-                    "t": h.get("t"),
-                    "orientacion": p.get("ori"),
-                    "energometro": p.get("E"),
-                    "roboscanner": p.get("R"),
-                    "monstroscopio": p.get("M"),
-                    "vacuscopio": p.get("V"),
-                    "posicion_anterior": p.get("pos_prev"),
-                    "accion": h.get("a")
-                })
-
-        print(f"🧾 Historial del Robot {self.id} exportado en: {ruta}")
+            writer = csv.writer(csvfile)
+            writer.writerow(columnas)
+            writer.writerows(filas)
+
+        if mostrar:
+            print(f"🧾 Historial del Robot {self.id} exportado en: {ruta}")
 
     def __repr__(self) -> str:
         """Representación simplificada del robot."""
@@ -1,9 +1,12 @@
 # environment.py
+import logging
 import random
-from typing import List, Any, Optional
+from typing import Any, Dict, KeysView, List, Optional, Tuple
 
 import numpy as np
 
+logger = logging.getLogger(__name__)
+
 
 class EntornoOperacion:
     """Entorno tridimensional N³ donde interactúan robots y monstruos."""
@@ -17,33 +20,42 @@ class EntornoOperacion:
         self.Pfree = Pfree
         self.Psoft = Psoft
 
+        # Generador propio para la malla; `random` sigue sembrándose para los agentes
         if seed is not None:
             random.seed(seed)
-            np.random.seed(seed)
+        self._rng = np.random.default_rng(seed)
 
-        self.grid = np.zeros((N, N, N), dtype=int)
+        self.grid = np.zeros((N, N, N), dtype=np.uint8)
         self._generar_entorno_aleatorio()
+        # Se incrementa con cada cambio de la malla para que las vistas sepan cuándo redibujarla
+        self.version_grid = 0
         self.robots: List[Any] = []
         self.monstruos: List[Any] = []
+        # Agentes activos por ID; las listas anteriores conservan el registro completo
+        self._robots_activos: Dict[int, Any] = {}
+        self._monstruos_activos: Dict[int, Any] = {}
+        # Listas de activos ya materializadas; se descartan al registrar o eliminar agentes
+        self._listas_activas: Dict[str, List[Any]] = {}
+        # Índice espacial: celda (x, y, z) -> agentes registrados que la ocupan
+        self._robots_por_celda: Dict[Tuple[int, int, int], List[Any]] = {}
+        self._monstruos_por_celda: Dict[Tuple[int, int, int], List[Any]] = {}
 
     # -------------------------------------------------------------------------
     # GENERACIÓN
     # -------------------------------------------------------------------------
     def _generar_entorno_aleatorio(self) -> None:
         """Genera el entorno asignando Zonas Libres o Vacías según la proporción definida."""
-        for x in range(self.N):
-            for y in range(self.N):
-                for z in range(self.N):
-                    self.grid[x, y, z] = self.ZONA_VACIA if random.random() < self.Psoft else self.ZONA_LIBRE
+        self.grid[:] = self.ZONA_LIBRE
+        self.grid[self._rng.random((self.N, self.N, self.N)) < self.Psoft] = self.ZONA_VACIA
 
         centro = self.N // 2
         self.grid[centro, centro, centro] = self.ZONA_LIBRE
 
-        total_vacias = int(np.sum(self.grid == self.ZONA_VACIA))
-        porcentaje = total_vacias / (self.N ** 3)
-        print(
-            f"🌍 Entorno generado ({self.N}³): {total_vacias} Zonas Vacías ({porcentaje:.1%}), "
-            f"{100 - porcentaje * 100:.1f}% Zonas Libres."
+        total_vacias = int(np.count_nonzero(self.grid))
+        porcentaje = 100 * total_vacias / self.N ** 3
+        logger.info(
+            "🌍 Entorno generado (%d³): %d Zonas Vacías (%.1f%%), %.1f%% Zonas Libres.",
+            self.N, total_vacias, porcentaje, 100 - porcentaje
         )
 
     # -------------------------------------------------------------------------
@@ -51,48 +63,171 @@ class EntornoOperacion:
     # -------------------------------------------------------------------------
     def obtener_tipo_celda(self, x: int, y: int, z: int) -> int:
         """Devuelve el tipo de zona (Libre o Vacía) en las coordenadas dadas."""
-        if 0 <= x < self.N and 0 <= y < self.N and 0 <= z < self.N:
-            return int(self.grid[x, y, z])
+        N = self.N
+        # (x | y | z) >= 0 equivale a comprobar que ninguna coordenada es negativa
+        if (x | y | z) >= 0 and x < N and y < N and z < N:
+            return self.grid.item(x, y, z)
         return self.ZONA_VACIA
 
+    def vaciar_celda(self, x: int, y: int, z: int) -> None:
+        """Convierte la celda indicada en Zona Vacía y registra el cambio de la malla."""
+        self.grid[x, y, z] = self.ZONA_VACIA
+        self.version_grid += 1
+
+    def muestrear_celdas_libres(self, k: int) -> List[Tuple[int, int, int]]:
+        """Elige `k` Zonas Libres distintas con el generador del entorno en una sola extracción."""
+        elegidas = self._rng.choice(np.flatnonzero(self.grid == self.ZONA_LIBRE), size=k, replace=False)
+        return list(zip(*(eje.tolist() for eje in np.unravel_index(elegidas, self.grid.shape))))
+
     # -------------------------------------------------------------------------
     # REGISTRO DE ENTIDADES
     # -------------------------------------------------------------------------
     def registrar_robot(self, robot: Any) -> bool:
         """Registra un robot si la celda es libre y no está ocupada por otro robot."""
         if self.obtener_tipo_celda(robot.x, robot.y, robot.z) == self.ZONA_VACIA:
-            print(f"⚠️ Robot {robot.id} en Zona Vacía ({robot.x}, {robot.y}, {robot.z}).")
+            logger.warning("⚠️ Robot %s en Zona Vacía (%d, %d, %d).", robot.id, robot.x, robot.y, robot.z)
             return False
-        if any((r.x, r.y, r.z) == (robot.x, robot.y, robot.z) for r in self.robots):
-            print(f"⚠️ Zona ocupada por otro Robot en ({robot.x}, {robot.y}, {robot.z}).")
+        celda = (robot.x, robot.y, robot.z)
+        if celda in self._robots_por_celda:
+            logger.warning("⚠️ Zona ocupada por otro Robot en (%d, %d, %d).", robot.x, robot.y, robot.z)
             return False
-        self.robots.append(robot)
+        self._alta(robot, self.robots, self._robots_activos, self._robots_por_celda)
         return True
 
     def registrar_monstruo(self, monstruo: Any) -> bool:
         """Registra un monstruo si la celda es libre y no está ocupada por otro monstruo."""
         if self.obtener_tipo_celda(monstruo.x, monstruo.y, monstruo.z) == self.ZONA_VACIA:
-            print(f"⚠️ Monstruo {monstruo.id} en Zona Vacía ({monstruo.x}, {monstruo.y}, {monstruo.z}).")
+            logger.warning(
+                "⚠️ Monstruo %s en Zona Vacía (%d, %d, %d).", monstruo.id, monstruo.x, monstruo.y, monstruo.z)
             return False
-        if any((m.x, m.y, m.z) == (monstruo.x, monstruo.y, monstruo.z) for m in self.monstruos):
-            print(f"⚠️ Zona ocupada por otro Monstruo en ({monstruo.x}, {monstruo.y}, {monstruo.z}).")
+        celda = (monstruo.x, monstruo.y, monstruo.z)
+        if celda in self._monstruos_por_celda:
+            logger.warning("⚠️ Zona ocupada por otro Monstruo en (%d, %d, %d).", monstruo.x, monstruo.y, monstruo.z)
             return False
-        self.monstruos.append(monstruo)
+        self._alta(monstruo, self.monstruos, self._monstruos_activos, self._monstruos_por_celda)
         return True
 
+    def registrar_robots(self, robots: List[Any]) -> np.ndarray:
+        """Registra un lote de robots; devuelve una máscara booleana con los aceptados."""
+        return self._registrar_lote(robots, "Robot", self.robots, self._robots_activos, self._robots_por_celda)
+
+    def registrar_monstruos(self, monstruos: List[Any]) -> np.ndarray:
+        """Registra un lote de monstruos; devuelve una máscara booleana con los aceptados."""
+        return self._registrar_lote(
+            monstruos, "Monstruo", self.monstruos, self._monstruos_activos, self._monstruos_por_celda)
+
+    def _registrar_lote(self, agentes: List[Any], etiqueta: str, registro: List[Any], activos: Dict[int, Any],
+                        indice: Dict[Tuple[int, int, int], List[Any]]) -> np.ndarray:
+        """
+        Valida el tipo de zona de todo el lote con una sola consulta a la malla y registra los agentes aceptados.
+
+        La ocupación se resuelve con el índice espacial, por lo que dos agentes del mismo lote
+        en la misma celda se tratan igual que en registros sucesivos: solo entra el primero.
+        """
+        xyz = np.array([(a.x, a.y, a.z) for a in agentes], dtype=np.int64).reshape(-1, 3)
+        dentro = ((xyz >= 0) & (xyz < self.N)).all(axis=1)
+        libres = np.zeros(len(agentes), dtype=bool)
+        x, y, z = xyz[dentro].T
+        libres[dentro] = self.grid[x, y, z] == self.ZONA_LIBRE
+
+        aceptados = np.zeros(len(agentes), dtype=bool)
+        for i, agente in enumerate(agentes):
+            celda = (agente.x, agente.y, agente.z)
+            if not libres[i]:
+                logger.warning("⚠️ %s %s en Zona Vacía (%d, %d, %d).", etiqueta, agente.id, *celda)
+            elif celda in indice:
+                logger.warning("⚠️ Zona ocupada por otro %s en (%d, %d, %d).", etiqueta, *celda)
+            else:
+                self._alta(agente, registro, activos, indice)
+                aceptados[i] = True
+        return aceptados
+
+    def _alta(self, agente: Any, registro: List[Any], activos: Dict[int, Any],
+              indice: Dict[Tuple[int, int, int], List[Any]]) -> None:
+        """Da de alta un agente ya validado: registro completo, activos por ID e índice espacial."""
+        registro.append(agente)
+        activos[agente.id] = agente
+        indice[(agente.x, agente.y, agente.z)] = [agente]
+        self._listas_activas.clear()
+
+    def actualizar_posicion_robot(self, robot: Any, anterior: Tuple[int, int, int]) -> None:
+        """Reubica en el índice espacial a un robot que se movió desde `anterior`."""
+        self._reubicar(self._robots_por_celda, robot, anterior)
+
+    def actualizar_posicion_monstruo(self, monstruo: Any, anterior: Tuple[int, int, int]) -> None:
+        """Reubica en el índice espacial a un monstruo que se movió desde `anterior`."""
+        self._reubicar(self._monstruos_por_celda, monstruo, anterior)
+
+    @staticmethod
+    def _reubicar(indice: Dict[Tuple[int, int, int], List[Any]], agente: Any, anterior: Tuple[int, int, int]) -> None:
+        """Mueve un agente de la celda `anterior` a su posición actual dentro del índice dado."""
+        ocupantes = indice.get(anterior)
+        if not ocupantes or agente not in ocupantes:
+            return
+        ocupantes.remove(agente)
+        if not ocupantes:
+            del indice[anterior]
+        indice.setdefault((agente.x, agente.y, agente.z), []).append(agente)
+
     # -------------------------------------------------------------------------
     # GESTIÓN
     # -------------------------------------------------------------------------
+    @property
+    def robots_activos(self) -> List[Any]:
+        """Robots que siguen operativos, en orden de registro. La lista es compartida y no debe modificarse."""
+        lista = self._listas_activas.get("robots")
+        if lista is None:
+            lista = self._listas_activas["robots"] = list(self._robots_activos.values())
+        return lista
+
+    @property
+    def monstruos_activos(self) -> List[Any]:
+        """Monstruos que siguen operativos, en orden de registro. La lista es compartida y no debe modificarse."""
+        lista = self._listas_activas.get("monstruos")
+        if lista is None:
+            lista = self._listas_activas["monstruos"] = list(self._monstruos_activos.values())
+        return lista
+
+    @property
+    def celdas_robots(self) -> KeysView[Tuple[int, int, int]]:
+        """Celdas ocupadas por robots activos (vista de solo lectura del índice espacial)."""
+        return self._robots_por_celda.keys()
+
+    @property
+    def celdas_monstruos(self) -> KeysView[Tuple[int, int, int]]:
+        """Celdas ocupadas por monstruos activos (vista de solo lectura del índice espacial)."""
+        return self._monstruos_por_celda.keys()
+
+    def monstruos_en(self, celda: Tuple[int, int, int]) -> List[Any]:
+        """Devuelve los monstruos activos que ocupan la celda dada."""
+        return self._monstruos_por_celda.get(celda, [])
+
+    def hay_agentes_activos(self) -> bool:
+        """Indica en O(1) si queda algún robot o monstruo operativo."""
+        return bool(self._robots_activos or self._monstruos_activos)
+
     def eliminar_robot(self, robot_id: int) -> None:
-        """Desactiva un robot por su ID."""
-        for r in self.robots:
-            if r.id == robot_id and r.activo:
-                r.activo = False
-                break
+        """Desactiva un robot por su ID y lo retira del índice espacial."""
+        r = self._robots_activos.pop(robot_id, None)
+        if r is not None:
+            r.activo = False
+            self._listas_activas.clear()
+            self._retirar(self._robots_por_celda, r)
 
     def eliminar_monstruo(self, monstruo_id: int) -> None:
-        """Desactiva un monstruo por su ID."""
-        for m in self.monstruos:
-            if m.id == monstruo_id and m.activo:
-                m.activo = False
-                break
+        """Desactiva un monstruo por su ID y lo retira del índice espacial."""
+        m = self._monstruos_activos.pop(monstruo_id, None)
+        if m is not None:
+            m.activo = False
+            self._listas_activas.clear()
+            self._retirar(self._monstruos_por_celda, m)
+
+    @staticmethod
+    def _retirar(indice: Dict[Tuple[int, int, int], List[Any]], agente: Any) -> None:
+        """Quita un agente de la celda que ocupa dentro del índice dado."""
+        celda = (agente.x, agente.y, agente.z)
+        ocupantes = indice.get(celda)
+        if ocupantes and agente in ocupantes:
+            ocupantes.remove(agente)
+            if not ocupantes:
+                del indice[celda]
@@ -1,12 +1,40 @@
 # simulation.py
-import random
 import time
-from typing import Tuple
+from dataclasses import dataclass, field
+from typing import Dict, Set, Tuple
 
 from agentes.agent_monster import AgenteReflejoMonstruo
 from agentes.agent_robot import AgenteRacionalRobot
 from agentes.environment import EntornoOperacion
-from agentes.visual_3d_manual import Visualizador3DManual
+
+# Separador de los bloques de consola
+_SEPARADOR = '=' * 70
+
+
+@dataclass(slots=True)
+class Metricas:
+    """Contadores de desempeño de una simulación; los agentes los actualizan como atributos en cada acción."""
+    reglas_usadas: Set[int] = field(default_factory=set)
+    avances: int = 0
+    rotaciones: int = 0
+    vacuumator: int = 0
+    colisiones: int = 0
+    colisiones_pre_primera_caza: int = 0
+    bucles_detectados: int = 0
+    exitos_totales: int = 0
+    acciones_totales: int = 0
+    monstruos_destruidos: int = 0
+    posiciones_iniciales: Dict[str, Tuple[int, int, int]] = field(default_factory=dict)
+    posiciones_finales: Dict[str, Tuple[int, int, int]] = field(default_factory=dict)
+    ticks_totales: int = 0
+    primer_vacuumator: bool = False
+    tiempo_total: float = 0.0
+    # Derivadas, calculadas al mostrar las estadísticas
+    tasa_colision: float = 0.0
+    porc_efectividad: float = 0.0
+    complejidad: int = 0
+    tiempo_medio_ciclo: float = 0.0
+    racionalidad: float = 0.0
 
 
 class SimulacionEnergetica:
@@ -22,7 +50,8 @@ class SimulacionEnergetica:
             seed: int | None = None,
             Pfree: float = 0.8,
             Psoft: float = 0.2,
-            p_movimiento: float = 0.7
+            p_movimiento: float = 0.7,
+            verbose: bool = True
     ) -> None:
         """Inicializa el entorno y crea los agentes energéticos y materiales."""
         self.N = N
@@ -34,26 +63,13 @@ class SimulacionEnergetica:
         self.Psoft = Psoft
         self.p_movimiento = p_movimiento
         self.seed = seed
+        self.verbose = verbose  # encabezado y estadísticas por consola; las métricas se calculan siempre
 
         self.entorno = EntornoOperacion(N=N, Psoft=Psoft, Pfree=Pfree, seed=seed)
         self.entorno.simulacion = self  # vínculo circular controlado
 
         # Registro de métricas
-        self.metricas = {
-            "reglas_usadas": set(),
-            "acciones": {"avances": 0, "rotaciones": 0, "vacuumator": 0},
-            "colisiones": 0,
-            "colisiones_pre_primera_caza": 0,
-            "bucles_detectados": 0,
-            "exitos_totales": 0,
-            "acciones_totales": 0,
-            "monstruos_destruidos": 0,
-            "posiciones_iniciales": {},
-            "posiciones_finales": {},
-            "ticks_totales": 0,
-            "primer_vacuumator": False,
-            "tiempo_total": 0.0,
-        }
+        self.metricas = Metricas()
 
         self._inicializar_agentes()
 
@@ -61,34 +77,30 @@ class SimulacionEnergetica:
     # CONFIGURACIÓN INICIAL
     # -------------------------------------------------------------------------
     def _inicializar_agentes(self) -> None:
-        """Crea y posiciona robots y monstruos en Zonas Libres aleatorias."""
-        for i in range(self.Nrobots):
-            while True:
-                x, y, z = self._posicion_aleatoria()
-                robot = AgenteRacionalRobot(id=i + 1, x=x, y=y, z=z)
+        """Crea y posiciona robots y monstruos en Zonas Libres aleatorias, sin repetir celda por tipo de agente."""
+        robots = [
+            AgenteRacionalRobot(id=i + 1, x=x, y=y, z=z)
+            for i, (x, y, z) in enumerate(self.entorno.muestrear_celdas_libres(self.Nrobots))
+        ]
+        # Solo los agentes aceptados por el entorno entran en las métricas
+        for robot, aceptado in zip(robots, self.entorno.registrar_robots(robots)):
+            if aceptado:
                 robot.simulacion = self  # para registrar métricas
-                if self.entorno.registrar_robot(robot):
-                    self.metricas["posiciones_iniciales"][f"robot_{i + 1}"] = (x, y, z)
-                    break
-
-        for i in range(self.Nmonstruos):
-            while True:
-                x, y, z = self._posicion_aleatoria()
-                monstruo = AgenteReflejoMonstruo(id=i + 1, x=x, y=y, z=z, p_movimiento=self.p_movimiento)
+                self.metricas.posiciones_iniciales[f"robot_{robot.id}"] = (robot.x, robot.y, robot.z)
+
+        monstruos = [
+            AgenteReflejoMonstruo(id=i + 1, x=x, y=y, z=z, p_movimiento=self.p_movimiento)
+            for i, (x, y, z) in enumerate(self.entorno.muestrear_celdas_libres(self.Nmonstruos))
+        ]
+        for monstruo, aceptado in zip(monstruos, self.entorno.registrar_monstruos(monstruos)):
+            if aceptado:
                 monstruo.simulacion = self
-                if self.entorno.registrar_monstruo(monstruo):
-                    break
-
-    def _posicion_aleatoria(self) -> Tuple[int, int, int]:
-        """Devuelve una posición aleatoria válida dentro del entorno N³."""
-        return (
-            random.randint(0, self.N - 1),
-            random.randint(0, self.N - 1),
-            random.randint(0, self.N - 1)
-        )
 
     def ejecutar_manual_3d(self) -> None:
         """Ejecuta la simulación en modo 3D manual controlado por el usuario."""
+        # Importación diferida: OpenGL solo se carga si se usa el modo visual
+        from agentes.visual_3d_manual import Visualizador3DManual
+
         print("🧊 Iniciando simulación 3D manual...")
         vis = Visualizador3DManual(self)
         vis.iniciar()
@@ -96,102 +108,106 @@ class SimulacionEnergetica:
     # -------------------------------------------------------------------------
     # MOTOR DE SIMULACIÓN
     # -------------------------------------------------------------------------
-    def ejecutar(self, delay: float = 0.0) -> None:
+    def ejecutar(self, delay: float = 0.0, carpeta_historiales: str = "resultados/historiales") -> None:
         """Ejecuta el ciclo energético principal de la simulación (modo silencioso)."""
 
         # ------------------------------------------------------------
         # ENCABEZADO INICIAL: parámetros configurables
         # ------------------------------------------------------------
-        print(f"\n{'=' * 70}")
-        print("⚡ SIMULACIÓN ENERGÉTICA 3D - PARÁMETROS INICIALES")
-        print(f"{'=' * 70}")
-        print(f"📦 Tamaño del entorno (N³): {self.N}x{self.N}x{self.N}")
-        print(f"🤖 Robots racionales: {self.Nrobots}")
-        print(f"👾 Monstruos reflejo: {self.Nmonstruos}")
-        print(f"🔁 Ciclos totales: {self.ticks}")
-        print(f"⏱️ Frecuencia de monstruos (K): {self.K_monstruo}")
-        print(f"🌱 Semilla aleatoria: {self.seed}")
-        print(f"🟩 Proporción zonas libres (Pfree): {self.Pfree}")
-        print(f"⬛ Proporción zonas vacías (Psoft): {self.Psoft}")
-        print(f"👣 Probabilidad movimiento monstruos: {self.p_movimiento}")
-        print(f"{'=' * 70}\n")
+        if self.verbose:
+            self._mostrar_encabezado()
 
+        # Solo el ciclo principal queda dentro de la ventana de medición
         tiempo_inicio = time.perf_counter()
-
-        # ------------------------------------------------------------
-        # CICLO PRINCIPAL
-        # ------------------------------------------------------------
-        for t in range(self.ticks):
-            # Monstruos reflejo activos
-            for monstruo in [m for m in self.entorno.monstruos if getattr(m, "activo", True)]:
-                monstruo.percibir_decidir_actuar(t, self.entorno, self.K_monstruo)
-
-            # Robots racionales activos
-            for robot in [r for r in self.entorno.robots if getattr(r, "activo", True)]:
-                evento = robot.percibir_decidir_actuar(t, self.entorno)
-                self.metricas["acciones_totales"] += 1
-                if evento.get("exito", False):
-                    self.metricas["exitos_totales"] += 1
-
-            # Fin anticipado si no quedan agentes activos
-            if not any(getattr(r, "activo", False) for r in self.entorno.robots) and \
-                    not any(getattr(m, "activo", False) for m in self.entorno.monstruos):
-                break
-
-            time.sleep(delay)
+        ticks_totales = self._ejecutar_ciclos(delay)
 
         # ------------------------------------------------------------
         # FINALIZACIÓN Y CÁLCULOS
         # ------------------------------------------------------------
-        self.metricas["tiempo_total"] = time.perf_counter() - tiempo_inicio
-        self.metricas["ticks_totales"] = t + 1
+        self.metricas.tiempo_total = time.perf_counter() - tiempo_inicio
+        self.metricas.ticks_totales = ticks_totales
 
         # Guardar posiciones finales
         for r in self.entorno.robots:
-            self.metricas["posiciones_finales"][f"robot_{r.id}"] = (r.x, r.y, r.z)
+            self.metricas.posiciones_finales[f"robot_{r.id}"] = (r.x, r.y, r.z)
+        self._calcular_metricas_derivadas()
 
         # ------------------------------------------------------------
         # MOSTRAR ESTADÍSTICAS
         # ------------------------------------------------------------
-        self._mostrar_estadisticas()
+        if self.verbose:
+            self._mostrar_estadisticas()
 
         # ------------------------------------------------------------
         # EXPORTAR HISTORIALES DE CADA ROBOT
         # ------------------------------------------------------------
         for robot in self.entorno.robots:
             if hasattr(robot, "exportar_historial_csv"):
-                robot.exportar_historial_csv()
+                robot.exportar_historial_csv(carpeta_historiales, mostrar=self.verbose)
+
+    def _mostrar_encabezado(self) -> None:
+        """Muestra en consola los parámetros iniciales de la simulación."""
+        print("\n".join((
+            "",
+            _SEPARADOR,
+            "⚡ SIMULACIÓN ENERGÉTICA 3D - PARÁMETROS INICIALES",
+            _SEPARADOR,
+            f"📦 Tamaño del entorno (N³): {self.N}x{self.N}x{self.N}",
+            f"🤖 Robots racionales: {self.Nrobots}",
+            f"👾 Monstruos reflejo: {self.Nmonstruos}",
+            f"🔁 Ciclos totales: {self.ticks}",
+            f"⏱️ Frecuencia de monstruos (K): {self.K_monstruo}",
+            f"🌱 Semilla aleatoria: {self.seed}",
+            f"🟩 Proporción zonas libres (Pfree): {self.Pfree}",
+            f"⬛ Proporción zonas vacías (Psoft): {self.Psoft}",
+            f"👣 Probabilidad movimiento monstruos: {self.p_movimiento}",
+            _SEPARADOR,
+            "",
+        )))
+
+    def _ejecutar_ciclos(self, delay: float = 0.0) -> int:
+        """Ejecuta los ciclos de monstruos y robots sin producir salida; devuelve los ticks ejecutados."""
+        entorno, K = self.entorno, self.K_monstruo
+        acciones_totales = exitos_totales = 0
+        t = -1
+        for t in range(self.ticks):
+            # Monstruos reflejo activos (lista cacheada por el entorno, se renueva solo al eliminar);
+            # fuera de los ciclos múltiplos de K su ciclo no hace nada y ni siquiera consume azar
+            if t % K == 0:
+                for monstruo in entorno.monstruos_activos:
+                    monstruo.percibir_decidir_actuar(t, entorno, K)
+
+            # Robots racionales activos
+            for robot in entorno.robots_activos:
+                acciones_totales += 1
+                if robot.percibir_decidir_actuar(t, entorno).exito:
+                    exitos_totales += 1
+
+            # Fin anticipado si no quedan agentes activos
+            if not entorno.hay_agentes_activos():
+                break
+
+            if delay > 0:
+                time.sleep(delay)
+
+        self.metricas.acciones_totales += acciones_totales
+        self.metricas.exitos_totales += exitos_totales
+        return t + 1
 
     # -------------------------------------------------------------------------
     # ESTADÍSTICAS Y MÉTRICAS
     # -------------------------------------------------------------------------
-    def _mostrar_estadisticas(self):
-        """Muestra en consola las métricas detalladas de desempeño del agente."""
+    def _calcular_metricas_derivadas(self) -> None:
+        """Calcula las métricas derivadas a partir de los contadores acumulados durante la simulación."""
         m = self.metricas
-        print(f"\n{'=' * 70}")
-        print("📊 ESTADÍSTICAS FINALES")
-        print(f"{'=' * 70}")
-        print(f"Reglas usadas (distintas): {len(m['reglas_usadas'])}")
-        print(f"Avances ejecutados: {m['acciones']['avances']}")
-        print(f"Rotaciones ejecutadas: {m['acciones']['rotaciones']}")
-        print(f"Vacuumator activado: {m['acciones']['vacuumator']}")
-        print(f"Colisiones totales: {m['colisiones']}")
-        print(f"Colisiones antes de primera caza: {m['colisiones_pre_primera_caza']}")
-        print(f"Bucles detectados: {m['bucles_detectados']}")
-        print(f"Ticks totales: {m['ticks_totales']}")
-        print(f"Tiempo total de simulación: {m['tiempo_total']:.3f} s")
-
-        # ---------------------------------------------------------------------
-        # MÉTRICAS DERIVADAS
-        # ---------------------------------------------------------------------
-        acciones_totales = max(1, m["acciones_totales"])
+        acciones_totales = max(1, m.acciones_totales)
         monstruos_totales = max(1, self.Nmonstruos)
 
         # Cálculos base
-        m["tasa_colision"] = m["colisiones"] / acciones_totales
-        m["porc_efectividad"] = (m["monstruos_destruidos"] / monstruos_totales) * 100
-        m["complejidad"] = m["acciones_totales"] + len(m["reglas_usadas"]) + m["bucles_detectados"]
-        m["tiempo_medio_ciclo"] = m["tiempo_total"] / max(1, m["ticks_totales"])
+        m.tasa_colision = m.colisiones / acciones_totales
+        m.porc_efectividad = (m.monstruos_destruidos / monstruos_totales) * 100
+        m.complejidad = m.acciones_totales + len(m.reglas_usadas) + m.bucles_detectados
+        m.tiempo_medio_ciclo = m.tiempo_total / max(1, m.ticks_totales)
 
         # ---------------------------------------------------------------------
         # RACIONALIDAD (mejorada)
@@ -199,31 +215,55 @@ class SimulacionEnergetica:
         # Ponderaciones (puedes ajustarlas)
         alpha, beta, lamb = 0.5, 0.3, 0.2
 
-        md = m["monstruos_destruidos"]
+        md = m.monstruos_destruidos
         mt = monstruos_totales
-        ae = m["exitos_totales"]
+        ae = m.exitos_totales
         at = acciones_totales
-        bd = m["bucles_detectados"]
+        bd = m.bucles_detectados
 
         # Cálculo de racionalidad ponderada
-        m["racionalidad"] = (alpha * (md / mt)) + (beta * (ae / at)) - (lamb * (bd / at))
+        m.racionalidad = (alpha * (md / mt)) + (beta * (ae / at)) - (lamb * (bd / at))
+
+    def _mostrar_estadisticas(self):
+        """Muestra en consola las métricas detalladas de desempeño del agente."""
+        m = self.metricas
+        # Todas las líneas se acumulan y se escriben con una sola llamada al final
+        lineas = [
+            "",
+            _SEPARADOR,
+            "📊 ESTADÍSTICAS FINALES",
+            _SEPARADOR,
+            f"Reglas usadas (distintas): {len(m.reglas_usadas)}",
+            f"Avances ejecutados: {m.avances}",
+            f"Rotaciones ejecutadas: {m.rotaciones}",
+            f"Vacuumator activado: {m.vacuumator}",
+            f"Colisiones totales: {m.colisiones}",
+            f"Colisiones antes de primera caza: {m.colisiones_pre_primera_caza}",
+            f"Bucles detectados: {m.bucles_detectados}",
+            f"Ticks totales: {m.ticks_totales}",
+            f"Tiempo total de simulación: {m.tiempo_total:.3f} s",
+        ]
 
         # ---------------------------------------------------------------------
-        # SALIDA FINAL
+        # MÉTRICAS DERIVADAS (ya calculadas por `_calcular_metricas_derivadas`)
         # ---------------------------------------------------------------------
-        print("\n🔢 MÉTRICAS DERIVADAS:")
-        print(f"→ Complejidad del agente: {m['complejidad']}")
-        print(
-            f"→ Porcentaje de efectividad: {m['porc_efectividad']:.1f}% ({m['monstruos_destruidos']}/{self.Nmonstruos})")
-        print(f"→ Tasa de colisión: {m['tasa_colision']:.3f}")
-        print(f"→ Tiempo medio por ciclo: {m['tiempo_medio_ciclo']:.4f} s")
-        print(f"→ Desempeño (racionalidad): {m['racionalidad']:.3f}")
-
-        for rid, pos_final in m["posiciones_finales"].items():
-            pos_ini = m["posiciones_iniciales"].get(rid)
-            print(f"¿{rid} retorna a posición inicial? {'Sí' if pos_ini == pos_final else 'No'}")
-
-        print(f"{'=' * 70}\n")
+        lineas += [
+            "",
+            "🔢 MÉTRICAS DERIVADAS:",
+            f"→ Complejidad del agente: {m.complejidad}",
+            f"→ Porcentaje de efectividad: {m.porc_efectividad:.1f}% "
+            f"({m.monstruos_destruidos}/{self.Nmonstruos})",
+            f"→ Tasa de colisión: {m.tasa_colision:.3f}",
+            f"→ Tiempo medio por ciclo: {m.tiempo_medio_ciclo:.4f} s",
+            f"→ Desempeño (racionalidad): {m.racionalidad:.3f}",
+        ]
+
+        for rid, pos_final in m.posiciones_finales.items():
+            pos_ini = m.posiciones_iniciales.get(rid)
+            lineas.append(f"¿{rid} retorna a posición inicial? {'Sí' if pos_ini == pos_final else 'No'}")
+
+        lineas += [_SEPARADOR, ""]
+        print("\n".join(lineas))
 
     def __repr__(self) -> str:
         """Retorna una representación textual de la configuración de la simulación."""
@@ -1,8 +1,31 @@
 # visual_3d_manual.py
+import numpy as np
+import OpenGL
+
+# Sin comprobación de errores ni copias de seguridad por llamada: deben fijarse antes de importar OpenGL.GL
+OpenGL.ERROR_CHECKING = False
+OpenGL.ARRAY_SIZE_CHECKING = False
+OpenGL.STORE_POINTERS = False
+
 from OpenGL.GL import *
 from OpenGL.GLU import *
 from OpenGL.GLUT import *
 
+# Separador de la salida de consola de cada tick
+_SEPARADOR = '=' * 60
+
+# Vector de cada orientación y rotación (ángulo, eje) que alinea el cono de la flecha (eje +Z) con él
+_ORIENTACIONES = {
+    "+X": (1, 0, 0), "-X": (-1, 0, 0),
+    "+Y": (0, 1, 0), "-Y": (0, -1, 0),
+    "+Z": (0, 0, 1), "-Z": (0, 0, -1)
+}
+_ROTACION_CONO = {
+    "+X": (90, 0, 1, 0), "-X": (-90, 0, 1, 0),
+    "+Y": (-90, 1, 0, 0), "-Y": (90, 1, 0, 0),
+    "+Z": None, "-Z": (180, 0, 1, 0)
+}
+
 
 class Visualizador3DManual:
     """Interfaz OpenGL para visualizar y avanzar la simulación 3D paso a paso."""
@@ -14,6 +37,15 @@ class Visualizador3DManual:
         self.rot_x, self.rot_y = 25, -45
         self.zoom = -25
         self.mouse_last = None
+        self.verbose = True  # detalle por consola de cada tick (tecla V)
+        # Listas de visualización del entorno (vacías, libres) y versión de la malla con la que se compilaron
+        self._lista_entorno = None
+        self._version_entorno = None
+        self._lista_rejilla = None
+        self._lista_agentes = None
+        self._agentes_sucios = True
+        # Último valor fijado de cada capacidad de OpenGL y de la máscara de profundidad
+        self._estado_gl = {}
 
     # ------------------------------------------------------------------
     # Inicialización
@@ -40,7 +72,6 @@ class Visualizador3DManual:
         glLightfv(GL_LIGHT0, GL_DIFFUSE, [0.9, 0.9, 0.9, 1.0])
 
         glutDisplayFunc(self._dibujar)
-        glutIdleFunc(self._loop)
         glutKeyboardFunc(self._teclas)
         glutMouseFunc(self._mouse)
         glutMotionFunc(self._rotar_mouse)
@@ -57,6 +88,8 @@ class Visualizador3DManual:
     # ------------------------------------------------------------------
     def _dibujar(self):
         """Renderiza el entorno, los agentes y la rejilla base."""
+        # glClear respeta la máscara de profundidad, que el fotograma anterior pudo dejar bloqueada
+        self._fijar_mascara_profundidad(True)
         glClear(GL_COLOR_BUFFER_BIT | GL_DEPTH_BUFFER_BIT)
         glLoadIdentity()
         glTranslatef(0, 0, self.zoom)
@@ -74,88 +107,134 @@ class Visualizador3DManual:
     # Entorno
     # ------------------------------------------------------------------
     def _dibujar_entorno(self):
-        """Dibuja las zonas libres (verde translúcido) y vacías (gris opaco)."""
-        N = self.simulacion.N
-        for x in range(N):
-            for y in range(N):
-                for z in range(N):
-                    tipo = self.simulacion.entorno.grid[x, y, z]
-
-                    if tipo == 1:  # ZONA_VACIA
-                        glEnable(GL_LIGHTING)
-                        glDepthMask(GL_TRUE)
-                        glColor4f(0.55, 0.55, 0.55, 1.0)
-                        self._cubo(x, y, z, solid=True)
-                    else:  # ZONA_LIBRE
-                        glDisable(GL_LIGHTING)
-                        glEnable(GL_BLEND)
-                        glDepthMask(GL_FALSE)
-                        glColor4f(0.2, 0.8, 0.2, 0.2)
-                        self._cubo(x, y, z, solid=True)
-                        glDepthMask(GL_TRUE)
-                        glDisable(GL_BLEND)
-                        glEnable(GL_LIGHTING)
+        """Dibuja las zonas vacías (gris opaco) y libres (verde translúcido) desde listas precompiladas."""
+        if self._lista_entorno is None or self._version_entorno != self.simulacion.entorno.version_grid:
+            self._compilar_entorno()
+
+        # ZONA_VACIA: opacas e iluminadas
+        self._fijar_capacidad(GL_LIGHTING, True)
+        self._fijar_capacidad(GL_COLOR_MATERIAL, True)
+        self._fijar_capacidad(GL_BLEND, False)
+        self._fijar_mascara_profundidad(True)
+        glCallList(self._lista_entorno)
+
+        # ZONA_LIBRE: translúcidas, sin escribir profundidad
+        self._fijar_capacidad(GL_LIGHTING, False)
+        self._fijar_capacidad(GL_BLEND, True)
+        self._fijar_mascara_profundidad(False)
+        glCallList(self._lista_entorno + 1)
+
+    def _compilar_entorno(self):
+        """Compila los cubos del entorno en dos listas de visualización; solo se repite si la malla cambia."""
+        entorno = self.simulacion.entorno
+        if self._lista_entorno is None:
+            self._lista_entorno = glGenLists(2)
+        vacias = entorno.grid == entorno.ZONA_VACIA
+        cubo = self._cubo
+
+        # Una Zona Vacía con sus 6 vecinas también vacías queda tapada por cubos opacos y no se graba;
+        # el relleno con False deja visibles las caras del borde del cubo N³
+        r = np.pad(vacias, 1, constant_values=False)
+        ocultas = (r[:-2, 1:-1, 1:-1] & r[2:, 1:-1, 1:-1] & r[1:-1, :-2, 1:-1]
+                   & r[1:-1, 2:, 1:-1] & r[1:-1, 1:-1, :-2] & r[1:-1, 1:-1, 2:])
+
+        # Las coordenadas de cada tipo se obtienen con una sola pasada vectorizada sobre la malla
+        glNewList(self._lista_entorno, GL_COMPILE)
+        for x, y, z in np.argwhere(vacias & ~ocultas).tolist():
+            glColor4f(0.55, 0.55, 0.55, 1.0)
+            cubo(x, y, z, solid=True)
+        glEndList()
+
+        glNewList(self._lista_entorno + 1, GL_COMPILE)
+        for x, y, z in np.argwhere(~vacias).tolist():
+            glColor4f(0.2, 0.8, 0.2, 0.2)
+            cubo(x, y, z, solid=True)
+        glEndList()
+
+        self._version_entorno = entorno.version_grid
 
     # ------------------------------------------------------------------
     # Agentes
     # ------------------------------------------------------------------
     def _dibujar_agentes(self):
         """Dibuja robots (rojos) y monstruos (azules) activos en el entorno."""
-        glDisable(GL_LIGHTING)
-        glDisable(GL_COLOR_MATERIAL)
-        glEnable(GL_BLEND)
-        glBlendFunc(GL_SRC_ALPHA, GL_ONE_MINUS_SRC_ALPHA)
-        glDepthMask(GL_FALSE)
+        self._fijar_capacidad(GL_LIGHTING, False)
+        self._fijar_capacidad(GL_COLOR_MATERIAL, False)
+        self._fijar_capacidad(GL_BLEND, True)
+        self._fijar_mascara_profundidad(False)
+
+        if self._lista_agentes is None:
+            self._compilar_agentes()
+        # Las posiciones solo cambian al avanzar un tick; entre ticks se reutiliza la lista compilada
+        if self._agentes_sucios:
+            self._compilar_escena_agentes()
+        glCallList(self._lista_agentes + 3)
+
+    def _compilar_escena_agentes(self):
+        """Graba en una lista de visualización los robots, sus flechas y los monstruos en su posición actual."""
+        glNewList(self._lista_agentes + 3, GL_COMPILE)
+
+        entorno = self.simulacion.entorno
+        robots = entorno.robots_activos
+        lista_robot, lista_monstruo = self._lista_agentes, self._lista_agentes + 1
+        orientacion = self._dibujar_orientacion
 
         # Robots
         glColor4f(1.0, 0.2, 0.2, 1.0)
-        for robot in self.simulacion.entorno.robots:
-            if not getattr(robot, "activo", True):
-                continue
+        for robot in robots:
             glPushMatrix()
             glTranslatef(robot.x + 0.5, robot.y + 0.5, robot.z + 0.5)
-            glScalef(0.92, 0.92, 0.92)
-            glutSolidCube(1.0)
+            glCallList(lista_robot)
             glPopMatrix()
-            if hasattr(robot, "orientacion"):
-                self._dibujar_orientacion(robot)
+
+        # Flechas de orientación (amarillas), con el estado fijado una vez para todas
+        glColor3f(1.0, 1.0, 0.0)
+        glLineWidth(3.0)
+        for robot in robots:
+            orientacion(robot)
+        glLineWidth(1.0)
 
         # Monstruos
         glColor4f(0.2, 0.5, 1.0, 1.0)
-        for m in self.simulacion.entorno.monstruos:
-            if not getattr(m, "activo", True):
-                continue
+        for m in entorno.monstruos_activos:
             glPushMatrix()
             glTranslatef(m.x + 0.5, m.y + 0.5, m.z + 0.5)
-            glScalef(0.92, 0.92, 0.92)
-            glutSolidSphere(0.6, 20, 20)
+            glCallList(lista_monstruo)
             glPopMatrix()
-
-        glDepthMask(GL_TRUE)
-        glDisable(GL_BLEND)
-        glEnable(GL_COLOR_MATERIAL)
-        glEnable(GL_LIGHTING)
+        glEndList()
+        self._agentes_sucios = False
+
+    def _compilar_agentes(self):
+        """Compila las mallas del robot (cubo), del monstruo (esfera) y del cono de orientación."""
+        # La cuarta lista se reserva para la escena de agentes (ver `_compilar_escena_agentes`)
+        self._lista_agentes = glGenLists(4)
+        glNewList(self._lista_agentes, GL_COMPILE)
+        glScalef(0.92, 0.92, 0.92)
+        glutSolidCube(1.0)
+        glEndList()
+
+        glNewList(self._lista_agentes + 1, GL_COMPILE)
+        glScalef(0.92, 0.92, 0.92)
+        glutSolidSphere(0.6, 20, 20)
+        glEndList()
+
+        glNewList(self._lista_agentes + 2, GL_COMPILE)
+        glutSolidCone(0.08, 0.2, 8, 8)
+        glEndList()
 
     def _dibujar_orientacion(self, robot):
-        """Dibuja una flecha amarilla indicando la orientación actual del robot."""
-        orientaciones = {
-            "+X": (1, 0, 0), "-X": (-1, 0, 0),
-            "+Y": (0, 1, 0), "-Y": (0, -1, 0),
-            "+Z": (0, 0, 1), "-Z": (0, 0, -1)
-        }
-
-        if robot.orientacion not in orientaciones:
+        """
+        Dibuja una flecha indicando la orientación actual del robot.
+
+        El color y el grosor de línea los fija quien llama, una sola vez para todas las flechas.
+        """
+        if robot.orientacion not in _ORIENTACIONES:
             return
 
-        dx, dy, dz = orientaciones[robot.orientacion]
+        dx, dy, dz = _ORIENTACIONES[robot.orientacion]
         base = (robot.x + 0.5, robot.y + 0.5, robot.z + 0.5)
         punta = (base[0] + dx * 0.6, base[1] + dy * 0.6, base[2] + dz * 0.6)
 
-        glPushAttrib(GL_ALL_ATTRIB_BITS)
-        glDisable(GL_LIGHTING)
-        glColor3f(1.0, 1.0, 0.0)
-        glLineWidth(3.0)
-
         glBegin(GL_LINES)
         glVertex3f(*base)
         glVertex3f(*punta)
@@ -163,21 +242,11 @@ class Visualizador3DManual:
 
         glPushMatrix()
         glTranslatef(*punta)
-
-        if dx == 1:
-            glRotatef(90, 0, 1, 0)
-        elif dx == -1:
-            glRotatef(-90, 0, 1, 0)
-        elif dy == 1:
-            glRotatef(-90, 1, 0, 0)
-        elif dy == -1:
-            glRotatef(90, 1, 0, 0)
-        elif dz == -1:
-            glRotatef(180, 0, 1, 0)
-
-        glutSolidCone(0.08, 0.2, 8, 8)
+        rotacion = _ROTACION_CONO[robot.orientacion]
+        if rotacion:
+            glRotatef(*rotacion)
+        glCallList(self._lista_agentes + 2)
         glPopMatrix()
-        glPopAttrib()
 
     # ------------------------------------------------------------------
     # Utilitarios de dibujo
@@ -196,7 +265,27 @@ class Visualizador3DManual:
 
     def _dibujar_rejilla(self):
         """Dibuja una rejilla plana de referencia sobre el plano XY."""
-        glDisable(GL_LIGHTING)
+        self._fijar_capacidad(GL_LIGHTING, False)
+        if self._lista_rejilla is None:
+            self._compilar_rejilla()
+        glCallList(self._lista_rejilla)
+
+    def _fijar_capacidad(self, capacidad, activa):
+        """Activa o desactiva una capacidad de OpenGL solo si su estado cambia respecto al último fijado."""
+        if self._estado_gl.get(capacidad) != activa:
+            (glEnable if activa else glDisable)(capacidad)
+            self._estado_gl[capacidad] = activa
+
+    def _fijar_mascara_profundidad(self, escribir):
+        """Habilita o bloquea la escritura en el buffer de profundidad solo si cambia."""
+        if self._estado_gl.get("mascara_profundidad") != escribir:
+            glDepthMask(GL_TRUE if escribir else GL_FALSE)
+            self._estado_gl["mascara_profundidad"] = escribir
+
+    def _compilar_rejilla(self):
+        """Compila la rejilla, que es estática, en una lista de visualización."""
+        self._lista_rejilla = glGenLists(1)
+        glNewList(self._lista_rejilla, GL_COMPILE)
         glColor3f(0.3, 0.3, 0.3)
         glBegin(GL_LINES)
         N = self.simulacion.N
@@ -206,17 +295,13 @@ class Visualizador3DManual:
             glVertex3f(0, i, 0);
             glVertex3f(N, i, 0)
         glEnd()
-        glEnable(GL_LIGHTING)
+        glEndList()
 
     # ------------------------------------------------------------------
     # Controles
     # ------------------------------------------------------------------
-    def _loop(self):
-        """Fuerza el redibujado continuo de la escena."""
-        glutPostRedisplay()
-
     def _teclas(self, key, x, y):
-        """Control de teclas: espacio=avanzar, W/S=zoom, ESC=salir."""
+        """Control de teclas: espacio=avanzar, W/S=zoom, V=detalle por consola, ESC=salir."""
         if key == b" ":
             self._tick()
         elif key == b"\x1b":
@@ -226,6 +311,14 @@ class Visualizador3DManual:
             self.zoom += 1
         elif key == b"s":
             self.zoom -= 1
+        elif key == b"v":
+            self.verbose = not self.verbose
+            print(f"🔈 Detalle por tick {'activado' if self.verbose else 'desactivado'}.")
+            return
+        else:
+            return
+        # Sin función idle, la escena solo se redibuja cuando algo cambia
+        glutPostRedisplay()
 
     def _mouse(self, button, state, x, y):
         """Captura el clic del mouse para rotación de cámara."""
@@ -242,36 +335,47 @@ class Visualizador3DManual:
             self.rot_x += dy * 0.5
             self.rot_y += dx * 0.5
             self.mouse_last = (x, y)
+            glutPostRedisplay()
 
     # ------------------------------------------------------------------
     # Tick manual
     # ------------------------------------------------------------------
     def _tick(self):
-        """Ejecuta un paso manual de simulación y actualiza el entorno."""
-        print(f"\n{'=' * 60}")
-        print(f"⚙️  [Tick {self.tick_actual}] Ejecución manual")
-        print(f"{'=' * 60}")
+        """Ejecuta un paso manual de simulación y actualiza el entorno; el detalle por consola depende de `verbose`."""
+        entorno, K, t, verbose = self.simulacion.entorno, self.simulacion.K_monstruo, self.tick_actual, self.verbose
+
+        # Las líneas de detalle se acumulan y se escriben con una sola llamada al final del tick
+        lineas = ["", _SEPARADOR, f"⚙️  [Tick {t}] Ejecución manual", _SEPARADOR] if verbose else None
 
         # Monstruos
-        print("\n👾 MONSTRUOS REFLEJO:")
-        for m in [m for m in self.simulacion.entorno.monstruos if getattr(m, "activo", True)]:
-            evento = m.percibir_decidir_actuar(self.tick_actual, self.simulacion.entorno, self.simulacion.K_monstruo)
-            if evento["exito"]:
-                print(f"  👾 [Monstruo {m.id}] Acción: {evento['accion']:<12} → Nueva pos: ({m.x}, {m.y}, {m.z})")
+        if verbose:
+            lineas += ["", "👾 MONSTRUOS REFLEJO:"]
+        for m in entorno.monstruos_activos:
+            evento = m.percibir_decidir_actuar(t, entorno, K)
+            if not verbose:
+                continue
+            if evento.exito:
+                lineas.append(f"  👾 [Monstruo {m.id}] Acción: {evento.accion:<12} → Nueva pos: ({m.x}, {m.y}, {m.z})")
             else:
-                print(f"  💤 [Monstruo {m.id}] Inactivo → {evento.get('razon', 'sin movimiento')}")
+                lineas.append(f"  💤 [Monstruo {m.id}] Inactivo → {evento.razon or 'sin movimiento'}")
 
         # Robots
-        print("\n🤖 ROBOTS RACIONALES:")
-        for r in [r for r in self.simulacion.entorno.robots if getattr(r, 'activo', True)]:
-            evento = r.percibir_decidir_actuar(self.tick_actual, self.simulacion.entorno)
-            razon = evento.get("razon", "sin motivo")
-            exito = "✅" if evento.get("exito", False) else "❌"
-            print(f"  🤖 [Robot {r.id}] Acción: {evento['accion']:<12} → {exito} | Regla: {razon}")
-            print(f"     📍 Posición actual: ({r.x}, {r.y}, {r.z})")
-
-            if evento["accion"] == "VACUUMATOR" and evento["exito"]:
-                print(f"     ⚠️ [Robot {r.id}] se autodestruye con Vacuumator.")
-
-        print(f"\n✅ [Tick {self.tick_actual}] Finalizado.\n")
+        if verbose:
+            lineas += ["", "🤖 ROBOTS RACIONALES:"]
+        for r in entorno.robots_activos:
+            evento = r.percibir_decidir_actuar(t, entorno)
+            if not verbose:
+                continue
+            razon = evento.razon or "sin motivo"
+            exito = "✅" if evento.exito else "❌"
+            lineas.append(f"  🤖 [Robot {r.id}] Acción: {evento.accion:<12} → {exito} | Regla: {razon}")
+            lineas.append(f"     📍 Posición actual: ({r.x}, {r.y}, {r.z})")
+
+            if evento.accion == "VACUUMATOR" and evento.exito:
+                lineas.append(f"     ⚠️ [Robot {r.id}] se autodestruye con Vacuumator.")
+
+        if verbose:
+            lineas += ["", f"✅ [Tick {t}] Finalizado.", ""]
+            print("\n".join(lineas))
         self.tick_actual += 1
+        self._agentes_sucios = True
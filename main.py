@@ -1,9 +1,17 @@
-from agentes.simulation import SimulacionEnergetica
+import argparse
+import logging
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
 
-if __name__ == "__main__":
-    """Punto de entrada principal del sistema de simulación energética 3D."""
+from agentes.simulation import SimulacionEnergetica
 
-    simulacionE2 = SimulacionEnergetica(
+# Escenarios de evaluación: mismo tamaño, agentes y semilla; cambia la dificultad del entorno y de los monstruos
+ESCENARIOS = {
+    # E1: entorno casi despejado y monstruos prácticamente inmóviles
+    "E1": dict(N=6, Nrobots=2, Nmonstruos=2, ticks=100, K_monstruo=999, seed=42,
+               Pfree=0.95, Psoft=0.05, p_movimiento=0.05),
+    # E2: configuración intermedia de referencia
+    "E2": dict(
         N=6,  # Tamaño del entorno cúbico (N³)
         Nrobots=2,  # Número de robots racionales
         Nmonstruos=2,  # Número de monstruos reflejo
@@ -13,7 +21,55 @@ if __name__ == "__main__":
         Pfree=0.8,  # Proporción de zonas libres (transitables)
         Psoft=0.2,  # Proporción de zonas vacías (obstáculos)
         p_movimiento=0.7  # Probabilidad de movimiento de cada monstruo
-    )
+    ),
+    # E3: más obstáculos, monstruos más frecuentes y móviles, ejecución más larga
+    "E3": dict(N=6, Nrobots=2, Nmonstruos=2, ticks=200, K_monstruo=2, seed=42,
+               Pfree=0.7, Psoft=0.3, p_movimiento=0.9),
+}
+
+
+def _configurar_logging() -> None:
+    """Muestra por consola los mensajes INFO del sistema; también se ejecuta al arrancar cada proceso del lote."""
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+
+
+def _ejecutar_escenario(nombre: str, delay: float = 0.0) -> str:
+    """Ejecuta un escenario en modo automático, sin visualización; cada proceso del lote ejecuta uno."""
+    # Carpeta propia por escenario: los nombres de los historiales solo llevan fecha y hora al segundo
+    SimulacionEnergetica(**ESCENARIOS[nombre]).ejecutar(
+        delay=delay, carpeta_historiales=f"resultados/historiales/{nombre}")
+    return nombre
+
+
+if __name__ == "__main__":
+    """Punto de entrada principal del sistema de simulación energética 3D."""
+    parser = argparse.ArgumentParser(description="Simulación energética 3D con robots racionales y monstruos reflejo.")
+    parser.add_argument("--escenario", choices=sorted(ESCENARIOS),
+                        help="escenario a ejecutar (por defecto E2)")
+    parser.add_argument("--automatico", action="store_true",
+                        help="ejecuta el escenario en modo automático en lugar del modo 3D manual")
+    parser.add_argument("--lote", action="store_true",
+                        help="ejecuta E1, E2 y E3 en paralelo (un proceso por escenario), sin visualización")
+    parser.add_argument("--delay", type=float, default=0.0,
+                        help="pausa en segundos entre ticks de las ejecuciones automáticas (por defecto 0: sin pausa)")
+    args = parser.parse_args()
+    # --lote ya ejecuta todos los escenarios en modo automático: no se combina con las opciones de un solo escenario
+    if args.lote and (args.escenario or args.automatico):
+        parser.error("--lote no admite --escenario ni --automatico")
+
+    _configurar_logging()
+
+    if args.lote:
+        # Las ejecuciones son independientes: se reparten entre procesos sin compartir estado.
+        # Con el arranque "spawn" (Windows, macOS) los procesos no heredan la configuración de logging
+        with ProcessPoolExecutor(max_workers=len(ESCENARIOS), initializer=_configurar_logging) as ejecutor:
+            for nombre in ejecutor.map(partial(_ejecutar_escenario, delay=args.delay), ESCENARIOS):
+                print(f"✅ Escenario {nombre} finalizado.")
+    else:
+        simulacion = SimulacionEnergetica(**ESCENARIOS[args.escenario or "E2"])
 
-    # Ejecución de la simulación
-    simulacionE2.ejecutar_manual_3d()
+        # Ejecución de la simulación
+        if args.automatico:
+            simulacion.ejecutar(delay=args.delay)
+        else:
+            simulacion.ejecutar_manual_3d()